@@ -0,0 +1,656 @@
+"""Load-test harness for the Flask endpoints in app.py.
+
+Starts the app (in-process or under gunicorn) with soffice replaced by a fake
+converter and Redis replaced by a filesystem broker (in RAM via /dev/shm where
+available) served by a real Celery worker, then drives
+concurrent /upload and /convert-to-pdf traffic built from generated templates
+and rosters.
+
+Example:
+    python loadtest.py --scenarios upload,convert --concurrency 1,4,8
+    python loadtest.py --server gunicorn --compare loadtest_results/abc1234.json
+"""
+import argparse
+import json
+import logging
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docx import Document
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Stand-in for LibreOffice: accepts the same command line as converter.py uses,
+# optionally sleeps/fails, and writes a minimal PDF next to where soffice would.
+FAKE_SOFFICE = '''#!{python}
+import os, random, sys, time
+args = sys.argv[1:]
+outdir, inputs, skip = '.', [], False
+for i, arg in enumerate(args):
+    if skip:
+        skip = False
+    elif arg in ('--outdir', '--convert-to'):
+        skip = True
+        if arg == '--outdir':
+            outdir = args[i + 1]
+    elif not arg.startswith('-'):
+        inputs.append(arg)
+time.sleep(float(os.environ.get('FAKE_SOFFICE_DELAY', '0')))
+if random.random() < float(os.environ.get('FAKE_SOFFICE_FAIL_RATE', '0')):
+    sys.stderr.write('fake soffice: simulated conversion failure\\n')
+    sys.exit(1)
+for path in inputs:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    with open(os.path.join(outdir, stem + '.pdf'), 'wb') as f:
+        f.write(b'%PDF-1.4\\n1 0 obj<<>>endobj\\ntrailer<<>>\\n%%EOF\\n')
+'''
+
+
+CELERY_CONFIG = """broker_transport_options = {{
+    'data_folder_in': '{queue}',
+    'data_folder_out': '{queue}',
+    'control_folder': '{control}',
+    'store_processed': False,
+}}
+"""
+
+
+def prepare_environment(workdir: Path, soffice_delay: float, soffice_fail_rate: float) -> Dict[str, str]:
+    """Install the fake soffice and local broker config, and return the environment to run with"""
+    bin_dir = workdir / 'bin'
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    soffice = bin_dir / 'soffice'
+    soffice.write_text(FAKE_SOFFICE.format(python=sys.executable))
+    soffice.chmod(0o755)
+
+    # Redis stand-in: kombu's filesystem transport, kept in RAM where /dev/shm exists,
+    # so gunicorn workers and the Celery worker share one queue without a server
+    broker_root = Path('/dev/shm') if os.access('/dev/shm', os.W_OK) else workdir
+    broker_dir = Path(tempfile.mkdtemp(prefix='diploma-loadtest-broker-', dir=broker_root))
+    for sub in ('queue', 'control', 'results'):
+        (broker_dir / sub).mkdir()
+    config_dir = workdir / 'config'
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / 'loadtest_celeryconfig.py').write_text(CELERY_CONFIG.format(
+        queue=broker_dir / 'queue', control=broker_dir / 'control'
+    ))
+
+    repo_dir = Path(__file__).resolve().parent
+    env = dict(os.environ)
+    env.update({
+        'PATH': f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(repo_dir), str(config_dir),
+                                                    env.get('PYTHONPATH')])),
+        'UPLOAD_FOLDER': str(workdir / 'uploads'),
+        'OUTPUT_FOLDER': str(workdir / 'output'),
+        'CELERY_BROKER_URL': 'filesystem://',
+        'CELERY_RESULT_BACKEND': f"file://{broker_dir / 'results'}",
+        'CELERY_CONFIG_MODULE': 'loadtest_celeryconfig',
+        'LOADTEST_BROKER_DIR': str(broker_dir),
+        # Only kill this run's fake soffice, never a LibreOffice the user has open;
+        # the [s] keeps the pattern from matching the pkill shell's own command line
+        'SOFFICE_KILL_ARGS': f"-f {shlex.quote(str(bin_dir / '[s]office'))}",
+        'FAKE_SOFFICE_DELAY': str(soffice_delay),
+        'FAKE_SOFFICE_FAIL_RATE': str(soffice_fail_rate),
+    })
+    return env
+
+
+# --- Generated inputs -------------------------------------------------------
+
+def make_template(path: Path, placeholder: str) -> None:
+    """Write a Word diploma template containing the placeholder"""
+    doc = Document()
+    doc.add_heading('Certificate of Graduation', level=1)
+    doc.add_paragraph('This certifies that')
+    doc.add_paragraph(placeholder)
+    doc.add_paragraph('has completed all requirements of the programme.')
+    doc.save(path)
+
+
+def make_roster(count: int, prefix: str) -> str:
+    """Return a names file body with one unique name per line"""
+    return ''.join(f"Graduate {prefix} {i:04d}\n" for i in range(count))
+
+
+def make_document(path: Path, name: str) -> None:
+    """Write a filled-in Word diploma for the PDF conversion endpoint"""
+    doc = Document()
+    doc.add_heading('Certificate of Graduation', level=1)
+    doc.add_paragraph(name)
+    doc.save(path)
+
+
+def encode_multipart(fields: Dict[str, str],
+                     files: List[Tuple[str, str, bytes, str]]) -> Tuple[bytes, str]:
+    """Encode form fields and (field, filename, data, mimetype) files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for field, filename, data, mimetype in files:
+        header = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                  f'filename="{filename}"\r\nContent-Type: {mimetype}\r\n\r\n')
+        parts.append(header.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class RequestFactory:
+    """Build request bodies for each scenario from generated templates and rosters"""
+
+    def __init__(self, fixtures_dir: Path, names: int, docs: int, placeholder: str = '[NAME]'):
+        self.names = names
+        self.placeholder = placeholder
+        fixtures_dir.mkdir(parents=True, exist_ok=True)
+
+        template_path = fixtures_dir / 'template.docx'
+        make_template(template_path, placeholder)
+        self.template = template_path.read_bytes()
+
+        self.documents = []
+        for i in range(docs):
+            doc_path = fixtures_dir / f'document_{i}.docx'
+            make_document(doc_path, f'Graduate {i:04d}')
+            self.documents.append(doc_path.read_bytes())
+
+    def build(self, scenario: str, seq: int) -> Tuple[str, bytes, str]:
+        """Return (path, body, content type) for request number seq of a scenario"""
+        # Unique filenames per request, as distinct users would upload
+        tag = f'{seq:05d}'
+        if scenario == 'upload':
+            body, content_type = encode_multipart(
+                {'placeholder': self.placeholder, 'output_format': 'docx'},
+                [('template', f'template_{tag}.docx', self.template, DOCX_MIMETYPE),
+                 ('names', f'names_{tag}.txt', make_roster(self.names, tag).encode(), 'text/plain')]
+            )
+            return '/upload', body, content_type
+        if scenario == 'convert':
+            body, content_type = encode_multipart(
+                {},
+                [('docx_files', f'diploma_{tag}_{i}.docx', data, DOCX_MIMETYPE)
+                 for i, data in enumerate(self.documents)]
+            )
+            return '/convert-to-pdf', body, content_type
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+# --- Servers ----------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _stop_process(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _wait_until_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready within {timeout}s")
+
+
+class CeleryWorker:
+    """Run the conversion worker with the same settings as the Docker image"""
+
+    def __init__(self, env: Dict[str, str], log_path: Path):
+        self.env = env
+        self.log_path = log_path
+        self._proc = None
+        self._log = None
+
+    @property
+    def pid(self) -> int:
+        return self._proc.pid
+
+    def __enter__(self):
+        self._log = open(self.log_path, 'w')
+        self._proc = subprocess.Popen(
+            [sys.executable, '-m', 'celery', '-A', 'tasks', 'worker',
+             '--loglevel=warning', '--concurrency=1'],
+            cwd=Path(__file__).resolve().parent,
+            env=self.env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            self._wait_until_ready()
+        except RuntimeError:
+            self.__exit__()
+            raise
+        return self
+
+    def _wait_until_ready(self, timeout: float = 60) -> None:
+        """Block until the worker answers a ping, so startup is not billed to the first requests"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._proc.poll() is not None:
+                raise RuntimeError(f"Celery worker exited with code {self._proc.returncode}, "
+                                   f"see {self.log_path}")
+            ping = subprocess.run(
+                [sys.executable, '-m', 'celery', '-A', 'tasks', 'inspect', 'ping', '--timeout', '1'],
+                cwd=Path(__file__).resolve().parent,
+                env=self.env,
+                capture_output=True,
+            )
+            if ping.returncode == 0:
+                return
+        raise RuntimeError(f"Celery worker did not answer a ping within {timeout}s")
+
+    def __exit__(self, *exc):
+        _stop_process(self._proc)
+        self._log.close()
+
+
+class InProcessServer:
+    """Serve app.py from a thread of this process (RSS includes the load generator)"""
+
+    def __init__(self, env: Dict[str, str]):
+        self.env = env
+        self.port = _free_port()
+        self.pid = os.getpid()
+        self._server = None
+
+    def __enter__(self):
+        # app and tasks read their configuration at import time
+        os.environ.update(self.env)
+        sys.path[:0] = self.env['PYTHONPATH'].split(os.pathsep)
+        from werkzeug.serving import make_server
+        from app import app
+
+        self._server = make_server('127.0.0.1', self.port, app, threaded=True)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        _wait_until_ready(self.port)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+
+
+class GunicornServer:
+    """Serve app.py under gunicorn with the same settings as the Docker image"""
+
+    def __init__(self, env: Dict[str, str], workers: int, threads: int,
+                 max_requests: int, max_requests_jitter: int, log_path: Path):
+        self.env = env
+        self.workers = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.log_path = log_path
+        self.port = _free_port()
+        self._proc = None
+        self._log = None
+
+    @property
+    def pid(self) -> int:
+        return self._proc.pid
+
+    def __enter__(self):
+        self._log = open(self.log_path, 'w')
+        self._proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn',
+             '--bind', f'127.0.0.1:{self.port}',
+             '--workers', str(self.workers),
+             '--threads', str(self.threads),
+             '--timeout', '120',
+             '--max-requests', str(self.max_requests),
+             '--max-requests-jitter', str(self.max_requests_jitter),
+             'app:app'],
+            cwd=Path(__file__).resolve().parent,
+            env=self.env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            _wait_until_ready(self.port)
+        except RuntimeError:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        _stop_process(self._proc)
+        self._log.close()
+
+
+# --- Resource sampling ------------------------------------------------------
+
+def _process_tree(root_pid: int) -> List[int]:
+    """Return root_pid and all of its descendants (Linux /proc only)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # ppid is the second field after the parenthesised command name
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def tree_rss_bytes(root_pids: List[int]) -> Optional[int]:
+    """Sum resident memory of process trees, or None where /proc is unavailable"""
+    if not os.path.isdir('/proc'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in set().union(*(_process_tree(root) for root in root_pids)):
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def disk_usage_bytes(paths: List[Path]) -> int:
+    """Total size of files under the given directories, tolerating concurrent deletes"""
+    total = 0
+    for root in paths:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+    return total
+
+
+class ResourceSampler(threading.Thread):
+    """Track peak RSS of the server and worker process trees and peak temp-disk use"""
+
+    def __init__(self, pids: List[int], dirs: List[Path], interval: float = 0.1):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.dirs = dirs
+        self.interval = interval
+        self.peak_rss = None
+        self.peak_disk = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def sample(self):
+        rss = tree_rss_bytes(self.pids)
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+        self.peak_disk = max(self.peak_disk, disk_usage_bytes(self.dirs))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+# --- Scenarios --------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def send_request(port: int, path: str, body: bytes, content_type: str, timeout: float) -> dict:
+    """POST a request and return its outcome and latency"""
+    start = time.perf_counter()
+    try:
+        conn = HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.request('POST', path, body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        payload = response.read()
+        conn.close()
+        outcome = {'status': response.status,
+                   'conversion_errors': response.getheader('X-Conversion-Errors')}
+        if response.status != 200:
+            outcome['error'] = payload[:200].decode('utf-8', 'replace').strip()
+    except Exception as e:
+        outcome = {'status': None, 'error': f"{type(e).__name__}: {e}"}
+    outcome['latency'] = time.perf_counter() - start
+    return outcome
+
+
+def run_scenario(server, worker: CeleryWorker, factory: RequestFactory, scenario: str,
+                 concurrency: int, total: int, dirs: List[Path], timeout: float) -> dict:
+    """Send total requests with the given concurrency and summarise the results"""
+    requests = [factory.build(scenario, seq) for seq in range(total)]
+    sampler = ResourceSampler([server.pid, worker.pid], dirs)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(
+            lambda req: send_request(server.port, *req, timeout=timeout), requests
+        ))
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    latencies = [o['latency'] for o in outcomes]
+    failures = [o for o in outcomes if o['status'] != 200]
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': total,
+        'duration_s': elapsed,
+        'throughput_rps': total / elapsed if elapsed else None,
+        'latency_p50_s': percentile(latencies, 50),
+        'latency_p95_s': percentile(latencies, 95),
+        'latency_p99_s': percentile(latencies, 99),
+        'error_rate': len(failures) / total if total else 0.0,
+        'partial_conversions': sum(1 for o in outcomes if o.get('conversion_errors')),
+        'sample_errors': sorted({str(o.get('error')) for o in failures})[:5],
+        'peak_rss_bytes': sampler.peak_rss,
+        'peak_temp_disk_bytes': sampler.peak_disk,
+    }
+
+
+# --- Reporting --------------------------------------------------------------
+
+def git_revision() -> str:
+    """Short commit hash of the working tree, marked -dirty if it has changes"""
+    cwd = Path(__file__).resolve().parent
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _fmt(value, scale: float = 1.0, unit: str = '') -> str:
+    return '-' if value is None else f"{value * scale:.1f}{unit}"
+
+
+def print_report(results: List[dict]) -> None:
+    columns = ['scenario', 'rps', 'p50', 'p95', 'p99', 'errors', 'rss', 'disk']
+    widths = [14, 8, 12, 12, 12, 8, 9, 9]
+    rows = [[f"{r['scenario']}-c{r['concurrency']}",
+             _fmt(r['throughput_rps']),
+             _fmt(r['latency_p50_s'], 1000, 'ms'),
+             _fmt(r['latency_p95_s'], 1000, 'ms'),
+             _fmt(r['latency_p99_s'], 1000, 'ms'),
+             _fmt(r['error_rate'], 100, '%'),
+             _fmt(r['peak_rss_bytes'], 1 / 2**20, 'M'),
+             _fmt(r['peak_temp_disk_bytes'], 1 / 2**20, 'M')] for r in results]
+
+    def line(cells):
+        # Left-align the scenario name, right-align metrics, always space-separated
+        return ' '.join(f"{cell:<{w}}" if i == 0 else f"{cell:>{w}}"
+                        for i, (cell, w) in enumerate(zip(cells, widths)))
+
+    header = line(columns)
+    print(header)
+    print('-' * len(header))
+    for r, row in zip(results, rows):
+        print(line(row))
+        for error in r['sample_errors']:
+            print(f"    ! {error}")
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    """Print relative change of each metric against a saved baseline run"""
+    print(f"\nComparison: {baseline['revision']} -> {current['revision']}")
+    old = {(r['scenario'], r['concurrency']): r for r in baseline['results']}
+    metrics = ['throughput_rps', 'latency_p50_s', 'latency_p95_s', 'latency_p99_s',
+               'error_rate', 'peak_rss_bytes', 'peak_temp_disk_bytes']
+    for r in current['results']:
+        prev = old.get((r['scenario'], r['concurrency']))
+        if prev is None:
+            continue
+        changes = []
+        for metric in metrics:
+            before, after = prev.get(metric), r.get(metric)
+            if before is None or after is None:
+                continue
+            if metric == 'error_rate':
+                if before != after:
+                    changes.append(f"{metric} {before:.0%} -> {after:.0%}")
+            elif before:
+                changes.append(f"{metric} {(after - before) / before * 100:+.1f}%")
+            elif after:
+                changes.append(f"{metric} 0 -> {after:.3g}")
+        print(f"  {r['scenario']}-c{r['concurrency']}: {', '.join(changes) or 'no change'}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--max-requests', type=int, default=50,
+                        help='gunicorn requests before a worker is recycled (0 disables)')
+    parser.add_argument('--max-requests-jitter', type=int, default=10,
+                        help='gunicorn jitter added to --max-requests')
+    parser.add_argument('--scenarios', default='upload,convert',
+                        help='comma-separated endpoints to exercise: upload, convert')
+    parser.add_argument('--concurrency', default='1,4',
+                        help='comma-separated concurrent client counts, one run each')
+    parser.add_argument('--requests', type=int, default=20, help='requests per scenario')
+    parser.add_argument('--names', type=int, default=30, help='names per roster for /upload')
+    parser.add_argument('--docs', type=int, default=2, help='Word files per /convert-to-pdf request')
+    parser.add_argument('--soffice-delay', type=float, default=0.2,
+                        help='seconds the fake soffice takes per conversion')
+    parser.add_argument('--soffice-fail-rate', type=float, default=0.0,
+                        help='fraction of fake soffice conversions that fail')
+    parser.add_argument('--max-error-rate', type=float,
+                        help='exit non-zero if any scenario exceeds this error rate (0-1)')
+    parser.add_argument('--timeout', type=float, default=600, help='per-request timeout in seconds')
+    parser.add_argument('--output', type=Path,
+                        help='results file (default: loadtest_results/<revision>.json)')
+    parser.add_argument('--compare', type=Path, help='previous results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='show application logs')
+    args = parser.parse_args(argv)
+
+    # app modules configure INFO logging on import; failures are summarised in the report
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    if not args.verbose:
+        # werkzeug raises its own logger to INFO unless a level is set
+        logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
+    # Read the baseline up front: the default output name can be the same file
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    concurrency_levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+
+    workdir = Path(tempfile.mkdtemp(prefix='diploma-loadtest-'))
+    try:
+        env = prepare_environment(workdir, args.soffice_delay, args.soffice_fail_rate)
+        dirs = [Path(env['UPLOAD_FOLDER']), Path(env['OUTPUT_FOLDER'])]
+        for d in dirs:
+            d.mkdir(parents=True, exist_ok=True)
+        factory = RequestFactory(workdir / 'fixtures', args.names, args.docs)
+
+        if args.server == 'gunicorn':
+            server = GunicornServer(env, args.workers, args.threads, args.max_requests,
+                                    args.max_requests_jitter, workdir / 'gunicorn.log')
+        else:
+            server = InProcessServer(env)
+
+        results = []
+        with CeleryWorker(env, workdir / 'celery.log') as worker, server:
+            for scenario in scenarios:
+                for concurrency in concurrency_levels:
+                    print(f"Running {scenario} with {concurrency} concurrent clients", flush=True)
+                    results.append(run_scenario(server, worker, factory, scenario, concurrency,
+                                                args.requests, dirs, args.timeout))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if 'env' in locals():
+            shutil.rmtree(env['LOADTEST_BROKER_DIR'], ignore_errors=True)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        'results': results,
+    }
+    print_report(results)
+
+    output = args.output or Path('loadtest_results') / f"{report['revision']}.json"
+    if args.compare and output.resolve() == args.compare.resolve():
+        # Re-runs on the same tree keep the baseline instead of overwriting it
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        output = output.with_name(f"{output.stem}-{stamp}{output.suffix}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {output}")
+
+    if baseline:
+        print_comparison(baseline, report)
+
+    # Failed requests are measurements, not harness errors, unless a threshold is set
+    if args.max_error_rate is not None:
+        worst = max((r['error_rate'] for r in results), default=0.0)
+        if worst > args.max_error_rate:
+            print(f"\nError rate {worst:.1%} exceeds --max-error-rate {args.max_error_rate:.1%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
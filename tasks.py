@@ -6,9 +6,10 @@ from converter import convert_single_doc_to_pdf
 import random
 
 # Configure Celery with Redis as both broker and result backend
+# (overridable via environment, e.g. a local broker for load testing)
 celery = Celery('tasks',
-                broker='redis://localhost:6379/0',
-                backend='redis://localhost:6379/1')
+                broker=os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+                backend=os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1'))
 
 # Configure Celery
 celery.conf.update(
@@ -22,15 +23,21 @@ celery.conf.update(
     worker_prefetch_multiplier=1,  # Only prefetch one task at a time
 )
 
+# Optional extra settings (e.g. broker transport options) from a config module
+celery.config_from_envvar('CELERY_CONFIG_MODULE', silent=True)
+
 # Use a single port for conversion to prevent conflicts
 SOFFICE_PORT = 8100
 
+# pkill arguments for clearing stale soffice processes (narrowed by the load test)
+SOFFICE_KILL_ARGS = os.environ.get('SOFFICE_KILL_ARGS', 'soffice')
+
 @celery.task(bind=True, max_retries=3)
 def convert_document(self, docx_path: str, pdf_path: str) -> dict:
     """Convert a single document with retry capability"""
     try:
         # Kill any existing soffice processes before starting
-        os.system("pkill soffice || true")
+        os.system(f"pkill {SOFFICE_KILL_ARGS} || true")
         time.sleep(1)  # Wait for process to clean up
         
         convert_single_doc_to_pdf(docx_path, pdf_path, SOFFICE_PORT)
@@ -42,7 +49,7 @@ def convert_document(self, docx_path: str, pdf_path: str) -> dict:
     except Exception as e:
         try:
             # Kill soffice process before retry
-            os.system("pkill soffice || true")
+            os.system(f"pkill {SOFFICE_KILL_ARGS} || true")
             time.sleep(2)  # Give more time for cleanup before retry
             self.retry(countdown=5)  # Retry after 5 seconds
         except self.MaxRetriesExceededError: